@@ -6,8 +6,17 @@ import database as db
 # 페이지 설정
 st.set_page_config(page_title="가계부", page_icon="💰", layout="wide")
 
-# 데이터베이스 초기화
-db.init_db()
+# 데이터베이스 초기화 (성공한 경우에만 캐시되어 프로세스당 한 번 실행)
+@st.cache_resource
+def init_db_once():
+    if not db.init_db():
+        # 예외로 빠져나가면 결과가 캐시되지 않아 다음 실행 때 다시 시도
+        raise RuntimeError("데이터베이스 초기화에 실패했습니다.")
+
+try:
+    init_db_once()
+except RuntimeError as e:
+    st.error(f"❌ {e}")
 
 # 카테고리 목록
 CATEGORIES = ["밥", "커피", "농구", "사람(술 등)", "기타"]
@@ -20,36 +29,76 @@ menu = st.sidebar.radio("메뉴", ["지출 추가", "지출 내역", "통계"])
 if menu == "지출 추가":
     st.header("💳 지출 추가")
 
-    with st.form("add_expense_form"):
-        col1, col2 = st.columns(2)
+    def save_expense(expense_date, category, amount, place, description):
+        success = db.add_expense(
+            date=expense_date,
+            category=category,
+            amount=amount,
+            place=place,
+            description=description
+        )
+        if success:
+            st.success("✅ 지출이 추가되었습니다!")
+            st.rerun()
+        else:
+            st.error("❌ 지출 추가에 실패했습니다.")
+
+    def clear_pending_expense():
+        st.session_state.pop("pending_expense", None)
+        st.session_state.pop("pending_duplicates", None)
+
+    # 폼 제출(중복 경고 포함)은 이 영역만 다시 실행
+    @st.fragment
+    def add_expense_fragment():
+        with st.form("add_expense_form"):
+            col1, col2 = st.columns(2)
+
+            with col1:
+                expense_date = st.date_input("날짜", value=date.today())
+                category = st.selectbox("항목", CATEGORIES)
+                amount = st.number_input("금액 (원)", min_value=0, step=100)
+
+            with col2:
+                place = st.text_input("지출처")
+                description = st.text_area("내용", height=100)
+
+            submitted = st.form_submit_button("추가")
+
+            if submitted:
+                clear_pending_expense()
+                if amount > 0:
+                    expense = (expense_date.strftime("%Y-%m-%d"), category, amount, place, description)
+                    duplicates = db.find_duplicates(
+                        date=expense[0],
+                        category=category,
+                        amount=amount,
+                        place=place
+                    )
+                    if duplicates:
+                        # 중복 의심 항목은 보류해 두고, 확인을 받은 경우에만 이 항목 하나를 추가
+                        st.session_state.pending_expense = expense
+                        st.session_state.pending_duplicates = duplicates
+                    else:
+                        save_expense(*expense)
+                else:
+                    st.warning("⚠️ 금액을 입력해주세요.")
 
-        with col1:
-            expense_date = st.date_input("날짜", value=date.today())
-            category = st.selectbox("항목", CATEGORIES)
-            amount = st.number_input("금액 (원)", min_value=0, step=100)
+        pending_expense = st.session_state.get("pending_expense")
+        if pending_expense:
+            st.warning("⚠️ 같은 지출이 이미 있는 것 같습니다.")
+            dup_df = pd.DataFrame(st.session_state.pending_duplicates, columns=["ID", "날짜", "항목", "금액", "지출처", "내용"])
+            dup_df["금액"] = dup_df["금액"].apply(lambda x: f"{x:,}원")
+            st.dataframe(dup_df.drop("ID", axis=1), use_container_width=True, hide_index=True)
 
-        with col2:
-            place = st.text_input("지출처")
-            description = st.text_area("내용", height=100)
-
-        submitted = st.form_submit_button("추가")
-
-        if submitted:
-            if amount > 0:
-                success = db.add_expense(
-                    date=expense_date.strftime("%Y-%m-%d"),
-                    category=category,
-                    amount=amount,
-                    place=place,
-                    description=description
-                )
-                if success:
-                    st.success("✅ 지출이 추가되었습니다!")
-                    st.rerun()
-                else:
-                    st.error("❌ 지출 추가에 실패했습니다.")
-            else:
-                st.warning("⚠️ 금액을 입력해주세요.")
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button("그래도 추가"):
+                    clear_pending_expense()
+                    save_expense(*pending_expense)
+            with col2:
+                st.button("취소", on_click=clear_pending_expense)
+
+    add_expense_fragment()
 
     # 최근 지출 내역 표시
     st.divider()
@@ -68,56 +117,16 @@ if menu == "지출 추가":
 elif menu == "지출 내역":
     st.header("📊 지출 내역")
 
-    # 필터 옵션
-    filter_type = st.radio("조회 방식", ["전체", "날짜 범위", "카테고리별"], horizontal=True)
-
-    if filter_type == "날짜 범위":
-        col1, col2 = st.columns(2)
-        with col1:
-            start_date = st.date_input("시작 날짜", value=date.today() - timedelta(days=30))
-        with col2:
-            end_date = st.date_input("종료 날짜", value=date.today())
-
-        expenses = db.get_expenses_by_date_range(
-            start_date.strftime("%Y-%m-%d"),
-            end_date.strftime("%Y-%m-%d")
-        )
-
-    elif filter_type == "카테고리별":
-        selected_category = st.selectbox("카테고리 선택", CATEGORIES)
-        expenses = db.get_expenses_by_category(selected_category)
-
-    else:  # 전체
-        expenses = db.get_all_expenses()
-
-    # 지출 내역 표시
-    if expenses:
-        df = pd.DataFrame(expenses, columns=["ID", "날짜", "항목", "금액", "지출처", "내용"])
-
-        # 통계 표시
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric("총 지출", f"{df['금액'].sum():,}원")
-        with col2:
-            st.metric("지출 건수", f"{len(df)}건")
-        with col3:
-            st.metric("평균 지출", f"{int(df['금액'].mean()):,}원")
-
-        st.divider()
-
-        # 데이터프레임 표시
-        display_df = df.copy()
-        display_df["금액"] = display_df["금액"].apply(lambda x: f"{x:,}원")
-        st.dataframe(display_df.drop("ID", axis=1), use_container_width=True, hide_index=True)
-
-        # 수정/삭제 기능
-        st.divider()
-        st.subheader("수정 / 삭제")
+    # 수정/삭제 항목 선택은 이 영역만 다시 실행 (목록 재조회 없음)
+    @st.fragment
+    def expense_edit_fragment():
+        # 목록 조회 시 만든 세션별 ID 인덱스
+        expense_index = st.session_state.expense_index
 
         col1, col2 = st.columns([2, 1])
         with col1:
-            expense_id = st.selectbox("수정/삭제할 항목 선택", df["ID"].tolist(),
-                                      format_func=lambda x: f"ID {x} - {df[df['ID']==x]['날짜'].values[0]} - {df[df['ID']==x]['항목'].values[0]} - {df[df['ID']==x]['금액'].values[0]:,}원")
+            expense_id = st.selectbox("수정/삭제할 항목 선택", list(expense_index),
+                                      format_func=lambda x: f"ID {x} - {expense_index[x][1]} - {expense_index[x][2]} - {expense_index[x][3]:,}원")
 
         with col2:
             action = st.radio("작업 선택", ["수정", "삭제"], horizontal=True)
@@ -131,19 +140,19 @@ elif menu == "지출 내역":
                     st.error("❌ 삭제에 실패했습니다.")
 
         else:  # 수정
-            selected_expense = df[df["ID"] == expense_id].iloc[0]
+            _, expense_date, category, amount, place, description = expense_index[expense_id]
 
             with st.form("edit_expense_form"):
                 col1, col2 = st.columns(2)
 
                 with col1:
-                    edit_date = st.date_input("날짜", value=datetime.strptime(selected_expense["날짜"], "%Y-%m-%d").date())
-                    edit_category = st.selectbox("항목", CATEGORIES, index=CATEGORIES.index(selected_expense["항목"]))
-                    edit_amount = st.number_input("금액 (원)", value=int(selected_expense["금액"]), min_value=0, step=100)
+                    edit_date = st.date_input("날짜", value=datetime.strptime(expense_date, "%Y-%m-%d").date())
+                    edit_category = st.selectbox("항목", CATEGORIES, index=CATEGORIES.index(category))
+                    edit_amount = st.number_input("금액 (원)", value=int(amount), min_value=0, step=100)
 
                 with col2:
-                    edit_place = st.text_input("지출처", value=selected_expense["지출처"] if selected_expense["지출처"] else "")
-                    edit_description = st.text_area("내용", value=selected_expense["내용"] if selected_expense["내용"] else "", height=100)
+                    edit_place = st.text_input("지출처", value=place if place else "")
+                    edit_description = st.text_area("내용", value=description if description else "", height=100)
 
                 if st.form_submit_button("✏️ 수정"):
                     if db.update_expense(expense_id, edit_date.strftime("%Y-%m-%d"), edit_category, edit_amount, edit_place, edit_description):
@@ -152,21 +161,67 @@ elif menu == "지출 내역":
                     else:
                         st.error("❌ 수정에 실패했습니다.")
 
-    else:
-        st.info("지출 내역이 없습니다.")
+    # 조회 조건 변경은 이 영역만 다시 실행
+    @st.fragment
+    def expense_list_fragment():
+        # 필터 옵션
+        filter_type = st.radio("조회 방식", ["전체", "날짜 범위", "카테고리별"], horizontal=True)
+
+        if filter_type == "날짜 범위":
+            col1, col2 = st.columns(2)
+            with col1:
+                start_date = st.date_input("시작 날짜", value=date.today() - timedelta(days=30))
+            with col2:
+                end_date = st.date_input("종료 날짜", value=date.today())
+
+            expenses = db.get_expenses_by_date_range(
+                start_date.strftime("%Y-%m-%d"),
+                end_date.strftime("%Y-%m-%d")
+            )
+
+        elif filter_type == "카테고리별":
+            selected_category = st.selectbox("카테고리 선택", CATEGORIES)
+            expenses = db.get_expenses_by_category(selected_category)
+
+        else:  # 전체
+            expenses = db.get_all_expenses()
+
+        # 지출 내역 표시
+        if expenses:
+            st.session_state.expense_index = {e[0]: e for e in expenses}
+            df = pd.DataFrame(expenses, columns=["ID", "날짜", "항목", "금액", "지출처", "내용"])
+
+            # 통계 표시
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("총 지출", f"{df['금액'].sum():,}원")
+            with col2:
+                st.metric("지출 건수", f"{len(df)}건")
+            with col3:
+                st.metric("평균 지출", f"{int(df['금액'].mean()):,}원")
+
+            st.divider()
+
+            # 데이터프레임 표시
+            df["금액"] = df["금액"].apply(lambda x: f"{x:,}원")
+            st.dataframe(df.drop("ID", axis=1), use_container_width=True, hide_index=True)
+
+            # 수정/삭제 기능
+            st.divider()
+            st.subheader("수정 / 삭제")
+
+            expense_edit_fragment()
+
+        else:
+            st.info("지출 내역이 없습니다.")
+
+    expense_list_fragment()
 
 
 # ========== 통계 ==========
 elif menu == "통계":
     st.header("📈 통계")
 
-    # 월 선택
-    col1, col2 = st.columns(2)
-    with col1:
-        selected_year = st.selectbox("년도", range(2020, 2031), index=date.today().year - 2020)
-    with col2:
-        selected_month = st.selectbox("월", range(1, 13), index=date.today().month - 1)
-
     # 전체 통계
     st.subheader("📊 전체 통계")
     all_summary = db.get_category_summary()
@@ -187,24 +242,35 @@ elif menu == "통계":
 
     st.divider()
 
-    # 월별 통계
-    st.subheader(f"📅 {selected_year}년 {selected_month}월 통계")
-    monthly_summary = db.get_monthly_summary(selected_year, selected_month)
+    # 월별 통계 (월 선택은 이 영역만 다시 실행)
+    @st.fragment
+    def monthly_summary_fragment():
+        # 월 선택
+        col1, col2 = st.columns(2)
+        with col1:
+            selected_year = st.selectbox("년도", range(2020, 2031), index=date.today().year - 2020)
+        with col2:
+            selected_month = st.selectbox("월", range(1, 13), index=date.today().month - 1)
 
-    if monthly_summary:
-        monthly_df = pd.DataFrame(monthly_summary, columns=["카테고리", "총 지출", "건수"])
+        st.subheader(f"📅 {selected_year}년 {selected_month}월 통계")
+        monthly_summary = db.get_monthly_summary(selected_year, selected_month)
 
-        col1, col2 = st.columns([2, 1])
-        with col1:
-            st.bar_chart(monthly_df.set_index("카테고리")["총 지출"])
+        if monthly_summary:
+            monthly_df = pd.DataFrame(monthly_summary, columns=["카테고리", "총 지출", "건수"])
 
-        with col2:
-            total_monthly = monthly_df["총 지출"].sum()
-            st.metric("이번 달 총 지출", f"{total_monthly:,}원")
-            st.divider()
-            for idx, row in monthly_df.iterrows():
-                percentage = (row["총 지출"] / total_monthly * 100) if total_monthly > 0 else 0
-                st.metric(row["카테고리"], f"{row['총 지출']:,}원", f"{percentage:.1f}%")
+            col1, col2 = st.columns([2, 1])
+            with col1:
+                st.bar_chart(monthly_df.set_index("카테고리")["총 지출"])
 
-    else:
-        st.info(f"{selected_year}년 {selected_month}월 지출 내역이 없습니다.")
+            with col2:
+                total_monthly = monthly_df["총 지출"].sum()
+                st.metric("이번 달 총 지출", f"{total_monthly:,}원")
+                st.divider()
+                for idx, row in monthly_df.iterrows():
+                    percentage = (row["총 지출"] / total_monthly * 100) if total_monthly > 0 else 0
+                    st.metric(row["카테고리"], f"{row['총 지출']:,}원", f"{percentage:.1f}%")
+
+        else:
+            st.info(f"{selected_year}년 {selected_month}월 지출 내역이 없습니다.")
+
+    monthly_summary_fragment()
@@ -1,7 +1,11 @@
 import sqlite3
 import os
+import threading
+import time
+import unicodedata
 from datetime import datetime
-from typing import List, Tuple, Optional
+from difflib import SequenceMatcher
+from typing import Callable, Dict, List, Tuple, Optional
 import streamlit as st
 
 # Google Sheets 사용 여부 확인
@@ -28,11 +32,73 @@ if USE_GSHEETS:
 
 DB_NAME = "wallet.db"
 
+# 지출처 유사도가 이 값 이상이면 같은 지출처로 간주
+PLACE_SIMILARITY_THRESHOLD = 0.8
+
+# 한쪽 지출처가 다른 쪽에 포함될 때 같은 곳으로 보는 조건
+# (짧은 쪽 최소 길이, 짧은 쪽 / 긴 쪽 길이 비율)
+PLACE_SUBSTRING_MIN_LENGTH = 3
+PLACE_SUBSTRING_MIN_RATIO = 0.5
+
+# Google Sheets 레코드 캐시 유지 시간 (초)
+SHEETS_CACHE_TTL = 60
+
+
+def normalize_place(place: Optional[str]) -> str:
+    """지출처 비교용 정규화 (대소문자, 공백, 특수문자 무시)"""
+    text = unicodedata.normalize("NFKC", str(place or "")).lower()
+    return "".join(ch for ch in text if ch.isalnum())
+
+
+def is_similar_place(place1: Optional[str], place2: Optional[str]) -> bool:
+    """두 지출처가 같은 곳으로 보이는지 확인"""
+    a = normalize_place(place1)
+    b = normalize_place(place2)
+    if a == b:
+        return True
+    if not a or not b:
+        return False
+    shorter, longer = sorted((a, b), key=len)
+    if (shorter in longer
+            and len(shorter) >= PLACE_SUBSTRING_MIN_LENGTH
+            and len(shorter) / len(longer) >= PLACE_SUBSTRING_MIN_RATIO):
+        return True
+    return SequenceMatcher(None, a, b).ratio() >= PLACE_SIMILARITY_THRESHOLD
+
+
+def dedup_key(date: str, category: str, amount: int) -> Tuple[str, str, int]:
+    """중복 검사용 해시 키 (날짜, 항목, 금액)"""
+    return (str(date), str(category), int(amount))
+
+
+def validate_expense(expense: Tuple) -> Tuple:
+    """일괄 추가할 (date, category, amount, place, description) 튜플 검증
+
+    값은 바꾸지 않고 그대로 돌려주며, 잘못된 항목이면 ValueError를 발생시킨다.
+    """
+    try:
+        date, category, amount, place, description = expense
+    except (ValueError, TypeError):
+        raise ValueError(f"(date, category, amount, place, description) 형식이 아닙니다: {expense!r}")
+
+    try:
+        datetime.strptime(date, "%Y-%m-%d")
+    except (ValueError, TypeError):
+        raise ValueError(f"날짜는 YYYY-MM-DD 형식이어야 합니다: {date!r}")
+
+    if not isinstance(category, str) or not category:
+        raise ValueError(f"항목이 비어 있습니다: {expense!r}")
+
+    if isinstance(amount, bool) or not isinstance(amount, int):
+        raise ValueError(f"금액은 정수여야 합니다: {amount!r}")
+
+    return (date, category, amount, place, description)
+
 
 class Database:
     """데이터베이스 추상화 클래스"""
 
-    def init_db(self):
+    def init_db(self) -> bool:
         raise NotImplementedError
 
     def add_expense(self, date: str, category: str, amount: int, place: str, description: str) -> bool:
@@ -59,11 +125,42 @@ class Database:
     def get_monthly_summary(self, year: int, month: int) -> List[Tuple]:
         raise NotImplementedError
 
+    def find_duplicates(self, date: str, category: str, amount: int, place: str) -> List[Tuple]:
+        raise NotImplementedError
+
+    def add_expenses(self, expenses: List[Tuple]) -> Tuple[bool, List[Tuple]]:
+        raise NotImplementedError
+
+    def _split_duplicates(self, expenses: List[Tuple],
+                          lookup: Callable[[str, str, int, str], List[Tuple]]) -> Tuple[List[Tuple], List[Tuple]]:
+        """가져올 지출 목록을 신규/중복으로 분리
+
+        expenses는 (date, category, amount, place, description) 튜플 목록이며,
+        기존 데이터는 lookup으로, 같은 목록 안의 중복은 키별 지출처 목록으로 확인한다.
+        잘못된 항목이 하나라도 있으면 아무것도 분리하지 않고 ValueError를 발생시킨다.
+        """
+        rows = [validate_expense(e) for e in expenses]
+        new_rows = []
+        duplicates = []
+        seen: Dict[Tuple[str, str, int], List[str]] = {}
+
+        for row in rows:
+            date, category, amount, place, description = row
+            places = seen.setdefault(dedup_key(date, category, amount), [])
+            if (any(is_similar_place(place, p) for p in places)
+                    or lookup(date, category, amount, place)):
+                duplicates.append(row)
+                continue
+            places.append(place)
+            new_rows.append(row)
+
+        return new_rows, duplicates
+
 
 class SQLiteDatabase(Database):
     """SQLite 데이터베이스"""
 
-    def init_db(self):
+    def init_db(self) -> bool:
         """데이터베이스 및 테이블 초기화"""
         conn = sqlite3.connect(DB_NAME)
         cursor = conn.cursor()
@@ -80,8 +177,15 @@ class SQLiteDatabase(Database):
             )
         """)
 
+        # 중복 검사용 인덱스 (날짜, 금액, 항목)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_expenses_dedup
+            ON expenses (date, amount, category)
+        """)
+
         conn.commit()
         conn.close()
+        return True
 
     def add_expense(self, date: str, category: str, amount: int, place: str, description: str) -> bool:
         """지출 내역 추가"""
@@ -228,6 +332,54 @@ class SQLiteDatabase(Database):
 
         return summary
 
+    @staticmethod
+    def _find_duplicates(cursor: sqlite3.Cursor, date: str, category: str, amount: int, place: str) -> List[Tuple]:
+        date, category, amount = dedup_key(date, category, amount)
+        cursor.execute("""
+            SELECT id, date, category, amount, place, description
+            FROM expenses
+            WHERE date = ? AND amount = ? AND category = ?
+            ORDER BY id DESC
+        """, (date, amount, category))
+
+        return [e for e in cursor.fetchall() if is_similar_place(place, e[4])]
+
+    def find_duplicates(self, date: str, category: str, amount: int, place: str) -> List[Tuple]:
+        """중복 의심 지출 내역 조회"""
+        conn = sqlite3.connect(DB_NAME)
+        cursor = conn.cursor()
+
+        duplicates = self._find_duplicates(cursor, date, category, amount, place)
+        conn.close()
+
+        return duplicates
+
+    def add_expenses(self, expenses: List[Tuple]) -> Tuple[bool, List[Tuple]]:
+        """지출 내역 일괄 추가 (성공 여부와 제외된 중복 의심 항목 반환)"""
+        conn = None
+        try:
+            conn = sqlite3.connect(DB_NAME)
+            cursor = conn.cursor()
+
+            new_rows, duplicates = self._split_duplicates(
+                expenses,
+                lambda d, c, a, p: self._find_duplicates(cursor, d, c, a, p)
+            )
+
+            cursor.executemany("""
+                INSERT INTO expenses (date, category, amount, place, description)
+                VALUES (?, ?, ?, ?, ?)
+            """, new_rows)
+
+            conn.commit()
+            return True, duplicates
+        except Exception as e:
+            print(f"Error adding expenses: {e}")
+            return False, []
+        finally:
+            if conn is not None:
+                conn.close()
+
 
 class GoogleSheetsDatabase(Database):
     """Google Sheets 데이터베이스"""
@@ -287,17 +439,74 @@ class GoogleSheetsDatabase(Database):
         self.spreadsheet = self.client.open_by_url(self.sheet_url)
         self.worksheet = self.spreadsheet.sheet1
 
-    def init_db(self):
+        # 레코드 캐시와 중복 검사 인덱스 (캐시 갱신 시 함께 재구성)
+        # 세션 스레드들이 인스턴스를 공유하므로, 무효화 이전에 시작된 로드가
+        # 캐시를 덮어쓰지 않도록 세대 번호로 확인한다.
+        self._cache: Optional[Tuple[List[Tuple], Dict[Tuple[str, str, int], List[Tuple]]]] = None
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._cache_lock = threading.Lock()
+
+    def init_db(self) -> bool:
         """스프레드시트 헤더 초기화"""
         try:
             # 첫 번째 행이 비어있으면 헤더 추가
             if not self.worksheet.row_values(1):
                 self.worksheet.append_row(['id', 'date', 'category', 'amount', 'place', 'description', 'created_at'])
+            return True
         except Exception as e:
             print(f"Error initializing sheet: {e}")
+            return False
+
+    def _invalidate_cache(self):
+        """레코드 캐시 무효화"""
+        with self._cache_lock:
+            self._generation += 1
+            self._cache = None
+
+    def _load_cache(self) -> Tuple[List[Tuple], Dict[Tuple[str, str, int], List[Tuple]]]:
+        """캐시된 (지출 내역, 중복 검사 인덱스) (만료 시 시트에서 다시 읽어 재구성)"""
+        with self._cache_lock:
+            cache = self._cache
+            generation = self._generation
+            if cache is not None and time.monotonic() - self._loaded_at < SHEETS_CACHE_TTL:
+                return cache
+
+        records = self.worksheet.get_all_records()
+        expenses = []
+        dedup_index: Dict[Tuple[str, str, int], List[Tuple]] = {}
+
+        for r in records:
+            try:
+                # 각 필드를 안전하게 변환
+                expense_id = int(r.get('id', 0))
+                date = str(r.get('date', ''))
+                category = str(r.get('category', ''))
+                amount = int(r.get('amount', 0))
+                place = str(r.get('place', ''))
+                description = str(r.get('description', ''))
+
+                expense = (expense_id, date, category, amount, place, description)
+                expenses.append(expense)
+                dedup_index.setdefault(dedup_key(date, category, amount), []).append(expense)
+            except (ValueError, TypeError) as e:
+                # 개별 레코드 변환 실패 시 건너뛰기
+                print(f"레코드 변환 실패: {r}, 에러: {e}")
+                continue
+
+        # 날짜 역순 정렬
+        expenses.sort(key=lambda x: (x[1], x[0]), reverse=True)
+
+        cache = (expenses, dedup_index)
+        with self._cache_lock:
+            # 로드 중에 무효화되었다면 오래된 결과로 캐시를 채우지 않음
+            if self._generation == generation:
+                self._cache = cache
+                self._loaded_at = time.monotonic()
+        return cache
 
     def _get_next_id(self) -> int:
-        """다음 ID 가져오기"""
+        """다음 ID 가져오기 (캐시를 쓰지 않고 시트에서 직접 읽음)"""
         all_records = self.worksheet.get_all_records()
         if not all_records:
             return 1
@@ -312,6 +521,7 @@ class GoogleSheetsDatabase(Database):
             self.worksheet.append_row([
                 expense_id, date, category, amount, place or "", description or "", created_at
             ])
+            self._invalidate_cache()
             return True
         except Exception as e:
             print(f"Error adding expense: {e}")
@@ -320,28 +530,8 @@ class GoogleSheetsDatabase(Database):
     def get_all_expenses(self) -> List[Tuple]:
         """모든 지출 내역 조회"""
         try:
-            records = self.worksheet.get_all_records()
-            expenses = []
-
-            for r in records:
-                try:
-                    # 각 필드를 안전하게 변환
-                    expense_id = int(r.get('id', 0))
-                    date = str(r.get('date', ''))
-                    category = str(r.get('category', ''))
-                    amount = int(r.get('amount', 0))
-                    place = str(r.get('place', ''))
-                    description = str(r.get('description', ''))
-
-                    expenses.append((expense_id, date, category, amount, place, description))
-                except (ValueError, TypeError) as e:
-                    # 개별 레코드 변환 실패 시 건너뛰기
-                    print(f"레코드 변환 실패: {r}, 에러: {e}")
-                    continue
-
-            # 날짜 역순 정렬
-            expenses.sort(key=lambda x: (x[1], x[0]), reverse=True)
-            return expenses
+            expenses, _ = self._load_cache()
+            return list(expenses)
         except Exception as e:
             error_msg = f"Google Sheets에서 데이터를 가져오는 중 에러 발생: {str(e)}"
             print(error_msg)
@@ -367,6 +557,7 @@ class GoogleSheetsDatabase(Database):
             for idx, record in enumerate(records, start=2):  # 2부터 시작 (헤더 제외)
                 if int(record['id']) == expense_id:
                     self.worksheet.update(f'B{idx}:F{idx}', [[date, category, amount, place or "", description or ""]])
+                    self._invalidate_cache()
                     return True
             return False
         except Exception as e:
@@ -380,6 +571,7 @@ class GoogleSheetsDatabase(Database):
             for idx, record in enumerate(records, start=2):  # 2부터 시작 (헤더 제외)
                 if int(record['id']) == expense_id:
                     self.worksheet.delete_rows(idx)
+                    self._invalidate_cache()
                     return True
             return False
         except Exception as e:
@@ -436,6 +628,33 @@ class GoogleSheetsDatabase(Database):
             print(f"Error getting monthly summary: {e}")
             return []
 
+    def find_duplicates(self, date: str, category: str, amount: int, place: str) -> List[Tuple]:
+        """중복 의심 지출 내역 조회"""
+        try:
+            _, dedup_index = self._load_cache()
+            candidates = dedup_index.get(dedup_key(date, category, amount), [])
+            return [e for e in candidates if is_similar_place(place, e[4])]
+        except Exception as e:
+            print(f"Error finding duplicates: {e}")
+            return []
+
+    def add_expenses(self, expenses: List[Tuple]) -> Tuple[bool, List[Tuple]]:
+        """지출 내역 일괄 추가 (성공 여부와 제외된 중복 의심 항목 반환)"""
+        try:
+            new_rows, duplicates = self._split_duplicates(expenses, self.find_duplicates)
+            if new_rows:
+                next_id = self._get_next_id()
+                created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                self.worksheet.append_rows([
+                    [next_id + i, date, category, amount, place or "", description or "", created_at]
+                    for i, (date, category, amount, place, description) in enumerate(new_rows)
+                ])
+                self._invalidate_cache()
+            return True, duplicates
+        except Exception as e:
+            print(f"Error adding expenses: {e}")
+            return False, []
+
 
 # 데이터베이스 인스턴스 생성
 if USE_GSHEETS:
@@ -445,7 +664,7 @@ else:
 
 
 # 기존 함수들은 데이터베이스 인스턴스로 위임
-def init_db():
+def init_db() -> bool:
     return _db.init_db()
 
 def add_expense(date: str, category: str, amount: int, place: str, description: str) -> bool:
@@ -471,3 +690,9 @@ def get_category_summary() -> List[Tuple]:
 
 def get_monthly_summary(year: int, month: int) -> List[Tuple]:
     return _db.get_monthly_summary(year, month)
+
+def find_duplicates(date: str, category: str, amount: int, place: str) -> List[Tuple]:
+    return _db.find_duplicates(date, category, amount, place)
+
+def add_expenses(expenses: List[Tuple]) -> Tuple[bool, List[Tuple]]:
+    return _db.add_expenses(expenses)
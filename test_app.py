@@ -0,0 +1,57 @@
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import database as db
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """임시 SQLite 파일을 쓰는 앱"""
+    monkeypatch.setattr(db, "DB_NAME", str(tmp_path / "wallet.db"))
+    st.cache_resource.clear()
+    at = AppTest.from_file("app.py", default_timeout=10)
+    at.run()
+    return at
+
+
+def submit_expense(at, amount, place):
+    at.number_input[0].set_value(amount)
+    at.text_input[0].set_value(place)
+    at.button[0].click()
+    at.run()
+
+
+def test_duplicate_is_held_until_confirmed(app):
+    submit_expense(app, 9000, "김밥천국")
+    assert len(db.get_all_expenses()) == 1
+
+    submit_expense(app, 9000, "김밥 천국")
+    assert len(db.get_all_expenses()) == 1
+    assert app.warning
+    assert app.session_state.pending_expense[3] == "김밥 천국"
+
+
+def test_override_adds_only_the_flagged_row_once(app):
+    submit_expense(app, 9000, "김밥천국")
+    submit_expense(app, 9000, "김밥 천국")
+
+    next(b for b in app.button if b.label == "그래도 추가").click()
+    app.run()
+    assert [e[4] for e in db.get_all_expenses()] == ["김밥 천국", "김밥천국"]
+    assert "pending_expense" not in app.session_state
+
+    # 확인 후에도 다음 중복은 다시 걸러짐
+    submit_expense(app, 9000, "김밥천국")
+    assert len(db.get_all_expenses()) == 2
+    assert app.session_state.pending_expense[3] == "김밥천국"
+
+
+def test_cancel_discards_pending_expense(app):
+    submit_expense(app, 9000, "김밥천국")
+    submit_expense(app, 9000, "김밥 천국")
+
+    next(b for b in app.button if b.label == "취소").click()
+    app.run()
+    assert "pending_expense" not in app.session_state
+    assert len(db.get_all_expenses()) == 1
@@ -0,0 +1,231 @@
+import threading
+
+import pytest
+
+import database as db
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """임시 파일을 쓰는 SQLite 데이터베이스"""
+    monkeypatch.setattr(db, "DB_NAME", str(tmp_path / "wallet.db"))
+    database = db.SQLiteDatabase()
+    database.init_db()
+    return database
+
+
+# ========== 지출처 정규화 / 비교 ==========
+def test_normalize_place_ignores_case_space_and_punctuation():
+    assert db.normalize_place(" Star-Bucks 강남점! ") == "starbucks강남점"
+    assert db.normalize_place("ＧＳ２５") == "gs25"
+
+
+def test_normalize_place_empty():
+    assert db.normalize_place(None) == ""
+    assert db.normalize_place("  ") == ""
+
+
+def test_is_similar_place_empty_matches_only_empty():
+    assert db.is_similar_place("", None)
+    assert not db.is_similar_place("", "스타벅스")
+
+
+@pytest.mark.parametrize("place1, place2", [
+    ("김밥천국", "김밥 천국"),
+    ("Starbucks", "starbucks "),
+    ("스타벅스", "스타벅스 강남점"),
+])
+def test_is_similar_place_matches(place1, place2):
+    assert db.is_similar_place(place1, place2)
+
+
+@pytest.mark.parametrize("place1, place2", [
+    ("cu", "cuisine"),
+    ("a", "카페a"),
+    ("스타벅스", "이디야"),
+])
+def test_is_similar_place_rejects(place1, place2):
+    assert not db.is_similar_place(place1, place2)
+
+
+# ========== 일괄 추가 검증 / 분리 ==========
+def test_split_duplicates_within_batch():
+    rows = [
+        ("2026-01-01", "밥", 9000, "김밥천국", ""),
+        ("2026-01-01", "밥", 9000, "김밥 천국", "두 번째"),
+        ("2026-01-01", "밥", 8000, "김밥천국", ""),
+    ]
+    new_rows, duplicates = db.Database()._split_duplicates(rows, lambda d, c, a, p: [])
+
+    assert new_rows == [rows[0], rows[2]]
+    assert duplicates == [rows[1]]
+
+
+def test_split_duplicates_rejects_invalid_rows():
+    row = (" 2026-01-01", "밥", 9000, "a", "")
+    with pytest.raises(ValueError):
+        db.Database()._split_duplicates([row], lambda d, c, a, p: [])
+
+
+@pytest.mark.parametrize("row", [
+    ("2026-01-01", "밥", 9000.7, "a", ""),
+    ("2026-01-01", "밥", "abc", "a", ""),
+    ("2026-01-01", "밥", True, "a", ""),
+    ("2026-01-01", "밥", 9000, "a"),
+    ("2026/01/01", "밥", 9000, "a", ""),
+    ("2026-01-01", "", 9000, "a", ""),
+])
+def test_validate_expense_rejects(row):
+    with pytest.raises(ValueError):
+        db.validate_expense(row)
+
+
+# ========== SQLite ==========
+def test_find_duplicates_against_stored_rows(sqlite_db):
+    assert sqlite_db.add_expense("2026-01-01", "밥", 9000, "김밥 천국", "")
+
+    duplicates = sqlite_db.find_duplicates("2026-01-01", "밥", 9000, "김밥천국")
+    assert [e[4] for e in duplicates] == ["김밥 천국"]
+
+    assert sqlite_db.find_duplicates("2026-01-01", "밥", 9000, "스타벅스") == []
+    assert sqlite_db.find_duplicates("2026-01-02", "밥", 9000, "김밥천국") == []
+    assert sqlite_db.find_duplicates("2026-01-01", "커피", 9000, "김밥천국") == []
+
+
+def test_add_expenses_skips_stored_and_batch_duplicates(sqlite_db):
+    sqlite_db.add_expense("2026-01-01", "밥", 9000, "김밥천국", "")
+
+    rows = [
+        ("2026-01-01", "밥", 9000, "김밥 천국", ""),
+        ("2026-01-02", "커피", 4500, "Starbucks", ""),
+        ("2026-01-02", "커피", 4500, "starbucks", ""),
+    ]
+    success, duplicates = sqlite_db.add_expenses(rows)
+
+    assert success
+    assert duplicates == [rows[0], rows[2]]
+    assert [e[1:5] for e in sqlite_db.get_all_expenses()] == [
+        ("2026-01-02", "커피", 4500, "Starbucks"),
+        ("2026-01-01", "밥", 9000, "김밥천국"),
+    ]
+
+
+def test_add_expenses_invalid_row_inserts_nothing(sqlite_db):
+    rows = [
+        ("2026-01-01", "밥", 9000, "김밥천국", ""),
+        ("2026-01-02", "커피", 9000.7, "Starbucks", ""),
+    ]
+    assert sqlite_db.add_expenses(rows) == (False, [])
+    assert sqlite_db.get_all_expenses() == []
+
+
+# ========== Google Sheets ==========
+SHEET_HEADER = ['id', 'date', 'category', 'amount', 'place', 'description', 'created_at']
+
+
+class FakeWorksheet:
+    """gspread Worksheet 대신 쓰는 메모리 시트 (헤더 제외한 행 목록)"""
+
+    def __init__(self, rows=None):
+        self.rows = [list(r) for r in rows or []]
+        self.reads = 0
+        self.on_read = None
+
+    def get_all_records(self):
+        self.reads += 1
+        records = [dict(zip(SHEET_HEADER, r)) for r in self.rows]
+        if self.on_read:
+            self.on_read()
+        return records
+
+    def append_row(self, row):
+        self.rows.append(list(row))
+
+    def append_rows(self, rows):
+        self.rows.extend(list(r) for r in rows)
+
+    def update(self, cell_range, values):
+        # 'B{idx}:F{idx}' 형식만 사용
+        idx = int(cell_range.split(':')[0][1:])
+        self.rows[idx - 2][1:6] = values[0]
+
+    def delete_rows(self, idx):
+        del self.rows[idx - 2]
+
+
+@pytest.fixture
+def sheets_db():
+    """FakeWorksheet를 쓰는 GoogleSheetsDatabase (인증 없이 생성)"""
+    database = object.__new__(db.GoogleSheetsDatabase)
+    database.worksheet = FakeWorksheet([
+        [1, '2026-01-01', '밥', 9000, '김밥천국', '', ''],
+    ])
+    database._cache = None
+    database._loaded_at = 0.0
+    database._generation = 0
+    database._cache_lock = threading.Lock()
+    return database
+
+
+def test_sheets_cache_is_reused_within_ttl(sheets_db):
+    sheets_db.find_duplicates('2026-01-01', '밥', 9000, '김밥천국')
+    sheets_db.get_all_expenses()
+    assert sheets_db.worksheet.reads == 1
+
+
+def test_sheets_write_invalidates_cache(sheets_db):
+    assert sheets_db.find_duplicates('2026-01-02', '커피', 4500, '스타벅스') == []
+
+    assert sheets_db.add_expense('2026-01-02', '커피', 4500, '스타벅스', '')
+    assert [e[0] for e in sheets_db.find_duplicates('2026-01-02', '커피', 4500, '스타벅스')] == [2]
+
+    assert sheets_db.update_expense(2, '2026-01-02', '커피', 5000, '스타벅스', '')
+    assert sheets_db.find_duplicates('2026-01-02', '커피', 4500, '스타벅스') == []
+    assert [e[0] for e in sheets_db.find_duplicates('2026-01-02', '커피', 5000, '스타벅스')] == [2]
+
+    assert sheets_db.delete_expense(2)
+    assert sheets_db.find_duplicates('2026-01-02', '커피', 5000, '스타벅스') == []
+
+
+def test_sheets_stale_load_does_not_overwrite_cache(sheets_db):
+    # 시트를 읽는 도중 다른 세션의 쓰기로 캐시가 무효화된 상황
+    sheets_db.worksheet.on_read = sheets_db._invalidate_cache
+
+    expenses, _ = sheets_db._load_cache()
+
+    assert [e[0] for e in expenses] == [1]
+    assert sheets_db._cache is None
+
+
+def test_sheets_bulk_ids_continue_from_fresh_sheet_max(sheets_db):
+    sheets_db.get_all_expenses()
+    # 캐시가 살아 있는 동안 시트에 직접 추가된 행
+    sheets_db.worksheet.rows.append([5, '2026-01-03', '기타', 100, '', '', ''])
+
+    success, duplicates = sheets_db.add_expenses([
+        ('2026-01-04', '밥', 8000, '한솥', ''),
+        ('2026-01-04', '커피', 4500, '이디야', ''),
+    ])
+
+    assert success
+    assert duplicates == []
+    assert [r[0] for r in sheets_db.worksheet.rows] == [1, 5, 6, 7]
+
+
+def test_sheets_bulk_skips_stored_duplicates(sheets_db):
+    success, duplicates = sheets_db.add_expenses([
+        ('2026-01-01', '밥', 9000, '김밥 천국', ''),
+        ('2026-01-04', '밥', 8000, '한솥', ''),
+    ])
+
+    assert success
+    assert duplicates == [('2026-01-01', '밥', 9000, '김밥 천국', '')]
+    assert [r[4] for r in sheets_db.worksheet.rows] == ['김밥천국', '한솥']
+
+
+def test_sheets_malformed_records_are_skipped(sheets_db):
+    sheets_db.worksheet.rows.append([2, '2026-01-01', '밥', 'abc', '김밥천국', '', ''])
+    sheets_db.worksheet.rows.append(['x', '2026-01-01', '밥', 9000, '김밥천국', '', ''])
+
+    assert [e[0] for e in sheets_db.get_all_expenses()] == [1]
+    assert [e[0] for e in sheets_db.find_duplicates('2026-01-01', '밥', 9000, '김밥천국')] == [1]